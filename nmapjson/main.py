@@ -1,10 +1,33 @@
-from typing import TextIO
+from typing import Any, BinaryIO
 from xml.etree import ElementTree
-import json
+from xml.etree.ElementTree import Element, TreeBuilder
+import dataclasses
+import operator
 import subprocess
 import sys
 
-from nmapjson.model import Host
+try:
+    from orjson import dumps as _dumps
+except ImportError:
+    _JSON_OPTIONS: dict[str, Any]
+    try:
+        import ujson as json  # type: ignore
+        _JSON_OPTIONS = dict(ensure_ascii=False, escape_forward_slashes=False)
+    except ImportError:
+        import json  # type: ignore[no-redef]
+        _JSON_OPTIONS = dict(ensure_ascii=False, separators=(',', ':'))
+
+    def _dumps(obj: object) -> bytes:  # type: ignore[misc]
+        return json.dumps(obj, **_JSON_OPTIONS).encode()
+
+from nmapjson.model import Host, Port
+
+_HOST_FIELDS = tuple(field.name for field in dataclasses.fields(Host) if field.name != 'ports')  # remove ports attribute
+_PORT_FIELDS = tuple(field.name for field in dataclasses.fields(Port))
+_PORT_KEYS = tuple('port' if name == 'number' else name for name in _PORT_FIELDS)  # rename number to port
+_host_values = operator.attrgetter(*_HOST_FIELDS)
+_port_values = operator.attrgetter(*_PORT_FIELDS)
+_BUFFER_SIZE = 1 << 20
 
 
 def main() -> int:
@@ -19,32 +42,94 @@ def main() -> int:
 
 def start_nmap(args: list[str]) -> subprocess.Popen:
     command = ['nmap', *args, '-oX', '-']
-    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, bufsize=_BUFFER_SIZE)
     return process
 
 
-def parse_output(reader: TextIO) -> None:
+def parse_output(reader: BinaryIO) -> None:
+    target = _HostTarget()
+    parser = ElementTree.XMLParser(target=target)
+    writer = sys.stdout.buffer
+    output = bytearray()
     try:
-        for event, element in ElementTree.iterparse(reader, events=['start', 'end']):
-            if event == 'start' and element.tag == 'nmaprun':
-                if not element.attrib.get('xmloutputversion', '').startswith('1.'):
-                    print('parser error: unsupported xml schema version', file=sys.stderr)
-                    break
-            elif event == 'end' and element.tag == 'host':
-                host = Host.from_xml(element)
-                print_json(host)
-            #else:
-            #    print(event, element.tag, element.attrib)
+        while True:
+            chunk = reader.read1(_BUFFER_SIZE)  # type: ignore
+            try:
+                if chunk:
+                    parser.feed(chunk)
+                else:
+                    parser.close()  # expat can defer a token that spans reads until here, so hosts can still end
+            finally:
+                # also hosts that ended before a parse error
+                for element in target.hosts:
+                    host = Host.from_xml(element)
+                    print_json(host, output)
+                target.hosts.clear()
+            if target.unsupported:
+                print('parser error: unsupported xml schema version', file=sys.stderr)
+                return
+            if output:
+                # one write per chunk of nmap output, flushed before blocking on the next read
+                writer.write(output)
+                writer.flush()
+                output.clear()
+            if not chunk:
+                break
     except ElementTree.ParseError as e:
         print(f'parser error: {e}', file=sys.stderr)
-    reader.close()
+    finally:
+        # hosts already printed into the buffer are not lost when a later one fails
+        writer.write(output)
+        writer.flush()
+        reader.close()
+
+
+class _HostTarget:
+    # builds a separate small tree for every host, elements outside of hosts and inside of scripts are skipped
+    def __init__(self) -> None:
+        self.hosts: list[Element] = []
+        self.unsupported = False
+        self._builder: TreeBuilder | None = None
+        self._skipped = 0
+
+    def start(self, tag: str, attrib: dict[str, str]) -> None:
+        if self._skipped:
+            self._skipped += 1
+        elif self._builder is not None:
+            self._builder.start(tag, attrib)
+            if tag == 'script':
+                self._skipped = 1  # only the attributes of scripts are used
+        elif tag == 'host' and not self.unsupported:
+            self._builder = TreeBuilder()
+            self._builder.start(tag, attrib)
+        elif tag == 'nmaprun':
+            self.unsupported = not attrib.get('xmloutputversion', '').startswith('1.')
+
+    def end(self, tag: str) -> None:
+        if self._skipped > 1:
+            self._skipped -= 1
+        elif self._builder is not None:
+            self._skipped = 0
+            element = self._builder.end(tag)
+            if tag == 'host':
+                self.hosts.append(element)
+                self._builder = None
+
+    def data(self, data: str) -> None:
+        if self._builder is not None and not self._skipped:
+            self._builder.data(data)
+
+    def close(self) -> None:
+        pass
 
 
-def print_json(host: Host):
-    for port in host.ports.values():
-        host_attrs = {k: v for k, v in host.__dict__.items() if k != 'ports'}  # remove ports attribute
-        port_attrs = {'port' if k == 'number' else k: v for k, v in port.__dict__.items()}  # rename number to port
-        print(json.dumps(host_attrs | port_attrs, indent=None, sort_keys=False, separators=(',', ':')))
+def print_json(host: Host, output: bytearray) -> None:
+    host_attrs = dict(zip(_HOST_FIELDS, _host_values(host)))
+    for port in host.ports:
+        attrs = host_attrs.copy()
+        attrs.update(zip(_PORT_KEYS, _port_values(port)))
+        output += _dumps(attrs)
+        output += b'\n'
 
 
 if __name__ == '__main__':
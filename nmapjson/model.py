@@ -1,10 +1,10 @@
 from __future__ import annotations
+from os.path import commonprefix
 from xml.etree.ElementTree import Element
 import dataclasses
-import textwrap
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Port:
     reachable: bool
     transport: str
@@ -17,57 +17,56 @@ class Port:
 
     @classmethod
     def from_xml(cls, element: Element) -> Port:
+        attrib = element.attrib
         service = element.find('service')
         if service is None:
-            service_name = ''
+            service_name = product = version = extra = ''
         else:
-            service_name = service.attrib['name']
+            service_attrib = service.attrib
+            service_name = service_attrib['name']
             service_name = service_name.removesuffix('-alt') if service_name in ('http-alt', 'https-alt') else service_name
+            product = service_attrib.get('product') or ''
+            version = service_attrib.get('version') or ''
+            extra = service_attrib.get('extra') or ''
         return cls(
-            reachable=_subelement(element, 'state').attrib['state'] == 'open',
-            number=int(element.attrib['portid']),
-            transport=element.attrib['protocol'],
+            reachable=element[0].attrib['state'] == 'open',  # nmap always emits state as first child of port
+            number=int(attrib['portid']),
+            transport=attrib['protocol'],
             application=service_name,
-            product=service.attrib.get('product') or '' if service else '',
-            version=service.attrib.get('version') or '' if service else '',
-            extra=service.attrib.get('extra') or '' if service else '',
-            infos={
-                subelement.attrib['id']: [
-                    line
-                    for index, line in enumerate(textwrap.dedent(subelement.attrib['output']).splitlines())
-                    if index > 1 or line
-                ]
-                for subelement in element.iter('script')
-            },
+            product=product,
+            version=version,
+            extra=extra,
+            infos={subelement.attrib['id']: _script_lines(subelement.attrib['output']) for subelement in element.iter('script')},
         )
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class Host:
     reachable: bool
     network: str
     address: str
     osvendor: str
     osfamily: str
-    ports: dict[int, Port]
+    ports: list[Port]
 
     @classmethod
     def from_xml(cls, element: Element) -> Host:
-        address = _subelement(element, 'address')
+        address = _subelement(element, 'address').attrib
         status = _subelement(element, 'status').attrib
         os = element.find('os')
         if os is not None:
-            osinfo = next(iter(sorted(os.iter('osclass'), key=lambda i: i.attrib['accuracy'])))
-            osvendor = osinfo.attrib['vendor']
-            osfamily = osinfo.attrib['osfamily']
+            osinfo = max(os.iter('osclass'), key=lambda i: int(i.attrib['accuracy']))
+            osattrib = osinfo.attrib
+            osvendor = osattrib['vendor']
+            osfamily = osattrib['osfamily']
         else:
             osvendor = ''
             osfamily = ''
-        ports = {port.number: port for port in (Port.from_xml(subelement) for subelement in _subelement(element, 'ports').iter('port')) if port.reachable}
+        ports = [port for port in (Port.from_xml(subelement) for subelement in _subelement(element, 'ports').iter('port')) if port.reachable]
         return cls(
             reachable=bool(ports) or (status['state'] == 'up' and status['reason'] != 'user-set'),
-            address=address.attrib['addr'],
-            network=address.attrib['addrtype'],
+            address=address['addr'],
+            network=address['addrtype'],
             osvendor=osvendor,
             osfamily=osfamily,
             ports=ports,
@@ -79,3 +78,16 @@ def _subelement(element: Element, name: str) -> Element:
     if subelement is None:
         raise ValueError(f'element {name!r} not found')
     return subelement
+
+
+def _script_lines(output: str) -> list[str]:
+    lines = _dedent_lines(output)
+    return [line for line in lines[:2] if line] + lines[2:]  # drop empty lines only from the first two
+
+
+def _dedent_lines(text: str) -> list[str]:
+    # same result as textwrap.dedent(text).splitlines() without the regex passes
+    lines = text.split('\n')
+    margin = commonprefix([line[:len(line) - len(line.lstrip(' \t'))] for line in lines if line.strip(' \t')])
+    size = len(margin)
+    return '\n'.join([line[size:] if line.strip(' \t') else '' for line in lines]).splitlines()